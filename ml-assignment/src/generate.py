@@ -6,7 +6,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from src.utils import download_gutenberg_text, clean_gutenberg_text, extract_text_from_file
+    from src.utils import load_gutenberg_text, extract_text_from_file
 except ImportError:
     # Fallback if utils not available
     pass
@@ -19,32 +19,33 @@ def main():
     """
     model = None
     
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.path.join(os.path.dirname(script_dir), "data")
+    
     # Option 1: Download and train on Project Gutenberg text (recommended)
     # Using Alice's Adventures in Wonderland by Lewis Carroll (Book ID: 11)
     # Other recommended books:
     # - Pride and Prejudice: Book ID 1342
     # - Frankenstein: Book ID 84
     # - A Tale of Two Cities: Book ID 98
-    print("Downloading Project Gutenberg text...")
+    print("Loading Project Gutenberg text...")
     print("Book: Alice's Adventures in Wonderland by Lewis Carroll")
     try:
         # Alice's Adventures in Wonderland (book ID: 11)
-        text = download_gutenberg_text(11)
-        cleaned_text = clean_gutenberg_text(text)
+        # Downloaded and cleaned on the first run, then read from data/
+        cleaned_text = load_gutenberg_text(11, data_dir)
         
         # For larger corpora (like Project Gutenberg), use unk_threshold=1
         # This replaces words that appear only once with <unk> to handle rare words
         model = TrigramModel(unk_threshold=1)
         model.fit(cleaned_text)
         print("Training complete!")
-        print(f"Trained on {len(cleaned_text.split())} words")
+        print(f"Trained on {model.num_tokens} words")
     except Exception as e:
         print(f"Error downloading Project Gutenberg text: {e}")
         print("Falling back to example corpus...")
         
         # Option 2: Fallback to example corpus if download fails
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        data_dir = os.path.join(os.path.dirname(script_dir), "data")
         corpus_path = os.path.join(data_dir, "example_corpus.txt")
         
         if os.path.exists(corpus_path):
@@ -1,7 +1,39 @@
 import random
-import re
-from collections import defaultdict
-from typing import Dict, List, Tuple
+import sys
+from array import array
+from bisect import bisect_right
+from collections import Counter, defaultdict, deque
+from itertools import accumulate, groupby, islice
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+
+# Cache-miss marker for _sampler_for (None is a valid cached value)
+_MISSING = object()
+
+
+def _draw(sampler: Tuple[List[str], array, Optional[array]]) -> str:
+    """
+    Draws one word from a sampler built by TrigramModel._build_sampler.
+    
+    Args:
+        sampler (Tuple[List[str], array, Optional[array]]): (words, prob, alias)
+        
+    Returns:
+        str: The sampled word
+    """
+    words, prob, alias = sampler
+    
+    # Small fan-out: prob holds cumulative counts
+    if alias is None:
+        return words[bisect_right(prob, random.random() * prob[-1])]
+    
+    # Alias method: one uniform draw picks a bucket (integer part) and
+    # decides between the bucket's word and its alias (fractional part)
+    u = random.random() * len(words)
+    i = int(u)
+    if u - i < prob[i]:
+        return words[i]
+    return words[alias[i]]
 
 
 class TrigramModel:
@@ -11,9 +43,20 @@ class TrigramModel:
     """
     
     # Special tokens for sentence boundaries and unknown words
-    START_TOKEN = "<start>"
-    END_TOKEN = "<end>"
-    UNK_TOKEN = "<unk>"
+    # (interned so they share identity with the interned corpus tokens)
+    START_TOKEN = sys.intern("<start>")
+    END_TOKEN = sys.intern("<end>")
+    UNK_TOKEN = sys.intern("<unk>")
+    
+    # Tokens left out of generated text (<unk> is kept as a placeholder word)
+    _EMIT_SKIP = frozenset((START_TOKEN, END_TOKEN))
+    
+    # Maximum number of per-context samplers kept in the LRU cache
+    SAMPLER_CACHE_SIZE = 8192
+    
+    # Contexts with at most this many distinct next words are sampled by
+    # bisecting cumulative counts; larger ones get an alias table
+    SMALL_FANOUT = 8
     
     def __init__(self, unk_threshold=1):
         """
@@ -24,53 +67,57 @@ class TrigramModel:
                                 will be replaced with <unk> during training.
                                 Default is 1 (only unseen words become unknown).
         """
-        # Nested dictionary to store trigram counts: counts[w1][w2][w3] = count
-        self.counts: Dict[str, Dict[str, Dict[str, int]]] = defaultdict(
-            lambda: defaultdict(lambda: defaultdict(int))
-        )
-        
-        # Store vocabulary for later use
-        self.vocab: Dict[str, int] = defaultdict(int)
-        
         # Threshold for unknown words
         self.unk_threshold = unk_threshold
         
         # Flag to check if model has been trained
         self.trained = False
+        
+        self._reset()
 
-    def _clean_text(self, text: str) -> str:
+    def _reset(self):
         """
-        Cleans the input text by converting to lowercase and normalizing whitespace.
-        We preserve sentence structure by keeping periods.
-        
-        Args:
-            text (str): Raw input text
-            
-        Returns:
-            str: Cleaned text
+        Clears everything learned from training text. fit calls this first, so
+        each call trains from scratch instead of merging with an earlier fit.
         """
-        # Convert to lowercase
-        text = text.lower()
+        # Trigram counts frozen into a CSR layout after training: the next words
+        # of context c are next_word_ids[offsets[c]:offsets[c + 1]], with their
+        # counts at the same positions in next_word_counts
+        self.context_index: Dict[Tuple[str, str], int] = {}
+        self.offsets = array('q', [0])
+        self.next_word_ids = array('I')
+        self.next_word_counts = array('I')
+        
+        # Total trigram count of each context, so probabilities need no re-summing
+        self.context_totals = array('Q')
+        
+        # Next-word samplers, built lazily per (w1, w2) context; dict order
+        # doubles as recency order for LRU eviction (see _sampler_for)
+        self._sampler_cache: Dict[Tuple[str, str], Optional[Tuple[List[str], array, Optional[array]]]] = {}
         
-        # Normalize whitespace (replace multiple spaces/tabs/newlines with single space)
-        text = re.sub(r'\s+', ' ', text)
+        # Store vocabulary for later use
+        self.vocab: Dict[str, int] = defaultdict(int)
         
-        return text.strip()
+        # Integer ids for every token seen in training (including special tokens)
+        self.word_to_id: Dict[str, int] = {}
+        self.id_to_word: List[str] = []
+        
+        # Number of word tokens seen by the last call to fit (before padding)
+        self.num_tokens = 0
 
-    def _tokenize(self, text: str) -> List[str]:
+    def _preprocess(self, text: str) -> List[str]:
         """
-        Tokenizes text into words, splitting on whitespace and punctuation.
-        Handles sentence boundaries.
+        Lowercases the input text and splits it into whitespace-delimited tokens.
+        str.split() with no arguments already splits on any run of whitespace,
+        so no separate normalization pass is needed.
         
         Args:
-            text (str): Cleaned text
+            text (str): Raw input text
             
         Returns:
             List[str]: List of tokens (words)
         """
-        # Split on whitespace
-        tokens = text.split()
-        return tokens
+        return text.lower().split()
 
     def _add_padding(self, tokens: List[str]) -> List[str]:
         """
@@ -100,7 +147,10 @@ class TrigramModel:
     def _handle_unknown_words(self, tokens: List[str]) -> List[str]:
         """
         Replaces rare words (below threshold) with <unk> token.
-        First pass counts all words, second pass replaces rare ones.
+        Word frequencies are counted with a single Counter pass; every distinct
+        word is then mapped once to either <unk> or its interned string, so the
+        replacement pass is one hashed lookup per token and repeated words share
+        a single string object.
         
         Args:
             tokens (List[str]): List of tokens
@@ -109,41 +159,50 @@ class TrigramModel:
             List[str]: Tokens with rare words replaced by <unk>
         """
         # First pass: count word frequencies (excluding special tokens)
-        word_counts = defaultdict(int)
-        for token in tokens:
-            if token not in [self.START_TOKEN, self.END_TOKEN, self.UNK_TOKEN]:
-                word_counts[token] += 1
-        
-        # Second pass: replace words below threshold with <unk>
-        processed_tokens = []
-        for token in tokens:
-            if token in [self.START_TOKEN, self.END_TOKEN]:
-                processed_tokens.append(token)
-            elif word_counts[token] <= self.unk_threshold:
-                processed_tokens.append(self.UNK_TOKEN)
-                self.vocab[self.UNK_TOKEN] += 1
+        word_counts = Counter(tokens)
+        word_counts.pop(self.START_TOKEN, None)
+        word_counts.pop(self.END_TOKEN, None)
+        unk_count = word_counts.pop(self.UNK_TOKEN, 0)
+        
+        # Map each distinct word to its replacement: <unk> if rare, else interned
+        replacement = {
+            self.START_TOKEN: self.START_TOKEN,
+            self.END_TOKEN: self.END_TOKEN,
+            self.UNK_TOKEN: self.UNK_TOKEN,
+        }
+        intern = sys.intern
+        for word, count in word_counts.items():
+            if count <= self.unk_threshold:
+                replacement[word] = self.UNK_TOKEN
+                unk_count += count
             else:
-                processed_tokens.append(token)
-                self.vocab[token] += 1
+                word = intern(word)
+                replacement[word] = word
+                self.vocab[word] += count
+        if unk_count:
+            self.vocab[self.UNK_TOKEN] += unk_count
         
-        return processed_tokens
+        # Second pass: replace words below threshold with <unk>
+        return list(map(replacement.__getitem__, tokens))
 
     def fit(self, text: str):
         """
         Trains the trigram model on the given text.
+        Each call replaces whatever an earlier call learned (counts, vocabulary
+        and samplers); to train on several texts, join them and fit once.
 
         Args:
             text (str): The text to train the model on.
         """
+        self._reset()
+        
         if not text or not text.strip():
             self.trained = True
             return
         
-        # Step 1: Clean the text
-        cleaned_text = self._clean_text(text)
-        
-        # Step 2: Tokenize into words
-        tokens = self._tokenize(cleaned_text)
+        # Steps 1-2: Lowercase and tokenize into words in a single pass
+        tokens = self._preprocess(text)
+        self.num_tokens = len(tokens)
         
         # Step 3: Handle unknown words (replace rare words with <unk>)
         tokens = self._handle_unknown_words(tokens)
@@ -151,18 +210,136 @@ class TrigramModel:
         # Step 4: Add padding tokens
         padded_tokens = self._add_padding(tokens)
         
-        # Step 5: Count trigrams
-        # For each position i, create trigram (w[i], w[i+1], w[i+2])
-        for i in range(len(padded_tokens) - 2):
-            w1 = padded_tokens[i]
-            w2 = padded_tokens[i + 1]
-            w3 = padded_tokens[i + 2]
-            
-            # Increment count for this trigram
-            self.counts[w1][w2][w3] += 1
+        # Step 5: Map tokens to integer ids (dedup and lookup both run in C)
+        self.id_to_word = list(dict.fromkeys(padded_tokens))
+        self.word_to_id = {word: i for i, word in enumerate(self.id_to_word)}
+        ids = array('i', map(self.word_to_id.__getitem__, padded_tokens))
+        
+        # Step 6: Count trigrams (w[i], w[i+1], w[i+2]) over the id array;
+        # islice offsets the array without copying it the way slicing would
+        trigram_counts = Counter(zip(ids, islice(ids, 1, None), islice(ids, 2, None)))
+        
+        # Step 7: Freeze counts into flat arrays
+        self._finalize(trigram_counts)
         
         self.trained = True
 
+    def _finalize(self, trigram_counts: Counter):
+        """
+        Freezes trigram counts into a CSR layout of contiguous arrays.
+        Sorting the (w1, w2, w3) id triples groups each context's next words
+        together, so the arrays fill in order and the only Python-level loop
+        runs once per context rather than once per trigram.
+        
+        Args:
+            trigram_counts (Counter): Counts keyed by (w1, w2, w3) id triples
+        """
+        id_to_word = self.id_to_word
+        context_index = {}
+        offsets = array('q', [0])
+        
+        # Fill the per-trigram arrays in C; only the context loop below is Python
+        keys = sorted(trigram_counts)
+        next_word_ids = array('I', map(itemgetter(2), keys))
+        next_word_counts = array('I', map(trigram_counts.__getitem__, keys))
+        
+        context_totals = array('Q')
+        
+        position = 0
+        for (i1, i2), group in groupby(keys, key=itemgetter(0, 1)):
+            context_index[(id_to_word[i1], id_to_word[i2])] = len(context_index)
+            start, position = position, position + len(list(group))
+            offsets.append(position)
+            context_totals.append(sum(next_word_counts[start:position]))
+        
+        self.context_index = context_index
+        self.offsets = offsets
+        self.next_word_ids = next_word_ids
+        self.next_word_counts = next_word_counts
+        self.context_totals = context_totals
+
+    def _build_sampler(self, context: Tuple[str, str]) -> Optional[Tuple[List[str], array, Optional[array]]]:
+        """
+        Builds the next-word sampler for one (w1, w2) context, picking the
+        cheaper representation for its fan-out k:
+        - k <= SMALL_FANOUT: (words, cumulative counts, None), sampled by
+          bisecting a uniform draw over the total count
+        - otherwise: a Vose alias table (words, prob, alias), sampled with one
+          random() call and one comparison regardless of k
+        Called through the LRU cache in _sampler_for, so samplers are only
+        built for contexts that generation actually visits.
+        
+        Args:
+            context (Tuple[str, str]): The (w1, w2) context
+            
+        Returns:
+            Optional[Tuple[List[str], array, Optional[array]]]: The sampler, or
+            None if the context was not seen during training
+        """
+        c = self.context_index.get(context)
+        if c is None:
+            return None
+        
+        start, end = self.offsets[c], self.offsets[c + 1]
+        words = [self.id_to_word[i] for i in self.next_word_ids[start:end]]
+        counts = self.next_word_counts[start:end]
+        k = len(words)
+        
+        if k <= self.SMALL_FANOUT:
+            return words, array('q', accumulate(counts)), None
+        
+        total = self.context_totals[c]
+        
+        # Scale probabilities so the average bucket holds exactly 1.0
+        scaled = [count * k / total for count in counts]
+        prob = array('d', [1.0] * k)
+        alias = array('i', range(k))
+        
+        small = deque(i for i, q in enumerate(scaled) if q < 1.0)
+        large = deque(i for i, q in enumerate(scaled) if q >= 1.0)
+        
+        # Pair each under-full bucket with an over-full one
+        while small and large:
+            s = small.popleft()
+            l = large.popleft()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        
+        # Leftover buckets are full (up to floating point error)
+        for i in small:
+            prob[i] = 1.0
+        for i in large:
+            prob[i] = 1.0
+        
+        return words, prob, alias
+
+    def _sampler_for(self, context: Tuple[str, str]) -> Optional[Tuple[List[str], array, Optional[array]]]:
+        """
+        Returns the cached sampler for a context, building it on a miss.
+        Hits are moved to the end of the cache dict and misses evict its first
+        (least recently used) entry once SAMPLER_CACHE_SIZE entries are held.
+        
+        Args:
+            context (Tuple[str, str]): The (w1, w2) context
+            
+        Returns:
+            Optional[Tuple[List[str], array, Optional[array]]]: The sampler, or
+            None if the context was not seen during training
+        """
+        cache = self._sampler_cache
+        sampler = cache.pop(context, _MISSING)
+        if sampler is _MISSING:
+            sampler = self._build_sampler(context)
+            if len(cache) >= self.SAMPLER_CACHE_SIZE:
+                del cache[next(iter(cache))]
+        cache[context] = sampler
+        return sampler
+
     def _get_next_word_probabilities(self, w1: str, w2: str) -> List[Tuple[str, float]]:
         """
         Converts trigram counts to probabilities for the next word given context (w1, w2).
@@ -174,23 +351,26 @@ class TrigramModel:
         Returns:
             List[Tuple[str, float]]: List of (word, probability) tuples
         """
-        if w1 not in self.counts or w2 not in self.counts[w1]:
+        c = self.context_index.get((w1, w2))
+        
+        if c is None:
             # Context not seen during training - return empty probabilities
             return []
         
         # Get all possible third words for this context
-        trigram_context = self.counts[w1][w2]
+        start, end = self.offsets[c], self.offsets[c + 1]
+        counts = self.next_word_counts[start:end]
         
-        # Calculate total count for this context
-        total_count = sum(trigram_context.values())
+        # Total count for this context, precomputed at fit time
+        total_count = self.context_totals[c]
         
         if total_count == 0:
             return []
         
         # Convert counts to probabilities
         probabilities = [
-            (word, count / total_count)
-            for word, count in trigram_context.items()
+            (self.id_to_word[i], count / total_count)
+            for i, count in zip(self.next_word_ids[start:end], counts)
         ]
         
         return probabilities
@@ -206,20 +386,13 @@ class TrigramModel:
         Returns:
             str: Sampled next word, or <end> if no valid context found
         """
-        probabilities = self._get_next_word_probabilities(w1, w2)
+        table = self._sampler_for((w1, w2))
         
-        if not probabilities:
+        if table is None:
             # If context not found, return end token to stop generation
             return self.END_TOKEN
         
-        # Extract words and their probabilities
-        words = [word for word, _ in probabilities]
-        probs = [prob for _, prob in probabilities]
-        
-        # Weighted random choice based on probabilities
-        next_word = random.choices(words, weights=probs, k=1)[0]
-        
-        return next_word
+        return _draw(table)
 
     def generate(self, max_length=50, seed_text: Tuple[str, str] = None) -> str:
         """
@@ -237,7 +410,7 @@ class TrigramModel:
             return ""
         
         # If no counts exist, return empty string
-        if not self.counts:
+        if not self.context_index:
             return ""
         
         # Initialize generation with start tokens or seed text
@@ -249,20 +422,28 @@ class TrigramModel:
         generated_words = []
         length = 0
         
+        # Bind lookups to locals: the loop below runs once per generated token
+        sampler_for = self._sampler_for
+        draw = _draw
+        append = generated_words.append
+        end_token = self.END_TOKEN
+        skip = self._EMIT_SKIP
+        
         # Generate words until we hit end token or max_length
         while length < max_length:
-            next_word = self._sample_next_word(w1, w2)
+            # Same draw as _sample_next_word, without the per-token method call
+            table = sampler_for((w1, w2))
+            if table is None:
+                break
+            next_word = draw(table)
             
             # Stop if we generate end token
-            if next_word == self.END_TOKEN:
+            if next_word == end_token:
                 break
             
             # Add word to generated sequence (skip special tokens in output)
-            if next_word not in [self.START_TOKEN, self.END_TOKEN, self.UNK_TOKEN]:
-                generated_words.append(next_word)
-            elif next_word == self.UNK_TOKEN:
-                # Include unknown token as a placeholder word
-                generated_words.append(next_word)
+            if next_word not in skip:
+                append(next_word)
             
             # Update context: shift window forward
             w1, w2 = w2, next_word
@@ -2,9 +2,133 @@
 Utility functions for data extraction, cleaning, and preprocessing.
 Includes functions for downloading and processing Project Gutenberg texts.
 """
+import codecs
+import contextlib
+import gzip
+import io
+import os
 import re
+import tempfile
 import urllib.request
 import urllib.error
+from typing import Iterator, Tuple
+
+# Read size used when streaming downloads
+_CHUNK_SIZE = 1 << 16
+
+# Project Gutenberg boundary markers, compiled once at import time
+_START_RE = re.compile(r"\*\*\* ?start of|start of the project gutenberg", re.IGNORECASE)
+_END_RE = re.compile(r"\*\*\* ?end of|end of the project gutenberg", re.IGNORECASE)
+_FALLBACK_START_RES = [
+    re.compile(r"\*\*\*.*?\n\n", re.IGNORECASE),
+    re.compile(r"chapter [i1]\s*\n", re.IGNORECASE),
+    re.compile(r"chapter one\s*\n", re.IGNORECASE),
+]
+
+# Same markers as bytes patterns, for searching undecoded downloads
+_START_RE_BYTES = re.compile(_START_RE.pattern.encode(), re.IGNORECASE)
+_END_RE_BYTES = re.compile(_END_RE.pattern.encode(), re.IGNORECASE)
+_FALLBACK_START_RES_BYTES = [
+    re.compile(pattern.pattern.encode(), re.IGNORECASE) for pattern in _FALLBACK_START_RES
+]
+
+_WS_RE = re.compile(r"\n{3,}|  +")
+
+# Version tag in cleaned-text cache file names (see load_gutenberg_text)
+_CLEAN_CACHE_VERSION = 1
+
+
+def _collapse_whitespace(match: re.Match) -> str:
+    """Replacement for _WS_RE: a paragraph break for newlines, one space otherwise."""
+    return '\n\n' if match.group().startswith('\n') else ' '
+
+
+def _iter_chunks(url: str, save_path: str = None) -> Iterator[bytes]:
+    """
+    Streams a URL's body in 64KB chunks, the single download path shared by
+    _fetch_text and _fetch_bytes.
+    
+    Requests a gzip-encoded response to cut bandwidth and yields the
+    decompressed chunks. When save_path is given, each raw chunk is also
+    written straight to disk.
+    
+    Args:
+        url (str): URL to download
+        save_path (str, optional): Path to save the downloaded bytes
+    
+    Yields:
+        bytes: Consecutive chunks of the decompressed body
+    """
+    request = urllib.request.Request(url, headers={'Accept-Encoding': 'gzip'})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        stream = response
+        if response.headers.get('Content-Encoding') == 'gzip':
+            stream = gzip.GzipFile(fileobj=response)
+        
+        with open(save_path, 'wb') if save_path else contextlib.nullcontext() as f:
+            while chunk := stream.read(_CHUNK_SIZE):
+                if f is not None:
+                    f.write(chunk)
+                yield chunk
+    
+    if save_path:
+        print(f"Text saved to {save_path}")
+
+
+def _fetch_text(url: str, save_path: str = None) -> str:
+    """
+    Downloads a URL's body, decoding each chunk as it arrives.
+    
+    An incremental UTF-8 decoder overlaps decoding with the download, so the
+    full body never has to be held as bytes.
+    
+    Args:
+        url (str): URL to download
+        save_path (str, optional): Path to save the downloaded text
+    
+    Returns:
+        str: The decoded text content
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    out = io.StringIO()
+    for chunk in _iter_chunks(url, save_path):
+        out.write(decoder.decode(chunk))
+    out.write(decoder.decode(b'', final=True))
+    return out.getvalue()
+
+
+def _fetch_bytes(url: str, save_path: str = None) -> bytes:
+    """
+    Downloads a URL's body without decoding it.
+    
+    Args:
+        url (str): URL to download
+        save_path (str, optional): Path to save the downloaded bytes
+    
+    Returns:
+        bytes: The raw (decompressed) body
+    """
+    return b''.join(_iter_chunks(url, save_path))
+
+
+def _download_gutenberg(book_id: int, save_path, fetch):
+    """
+    Fetches a Project Gutenberg book with `fetch`, trying the "-0.txt"
+    (UTF-8) URL first and falling back to the plain ".txt" URL.
+    """
+    url = f"https://www.gutenberg.org/files/{book_id}/{book_id}-0.txt"
+    
+    try:
+        return fetch(url, save_path)
+    except urllib.error.URLError as e:
+        print(f"Error downloading text: {e}")
+        print(f"Trying alternative URL format...")
+        # Try alternative URL format
+        url_alt = f"https://www.gutenberg.org/files/{book_id}/{book_id}.txt"
+        try:
+            return fetch(url_alt, save_path)
+        except urllib.error.URLError:
+            raise urllib.error.URLError(f"Failed to download book {book_id} from Project Gutenberg")
 
 
 def download_gutenberg_text(book_id: int, save_path: str = None) -> str:
@@ -31,107 +155,159 @@ def download_gutenberg_text(book_id: int, save_path: str = None) -> str:
     Raises:
         urllib.error.URLError: If download fails
     """
-    url = f"https://www.gutenberg.org/files/{book_id}/{book_id}-0.txt"
-    
-    try:
-        with urllib.request.urlopen(url, timeout=10) as response:
-            text = response.read().decode('utf-8')
-            
-            # Save to file if path provided
-            if save_path:
-                with open(save_path, 'w', encoding='utf-8') as f:
-                    f.write(text)
-                print(f"Text saved to {save_path}")
-            
-            return text
-    except urllib.error.URLError as e:
-        print(f"Error downloading text: {e}")
-        print(f"Trying alternative URL format...")
-        # Try alternative URL format
-        url_alt = f"https://www.gutenberg.org/files/{book_id}/{book_id}.txt"
-        try:
-            with urllib.request.urlopen(url_alt, timeout=10) as response:
-                text = response.read().decode('utf-8')
-                if save_path:
-                    with open(save_path, 'w', encoding='utf-8') as f:
-                        f.write(text)
-                return text
-        except urllib.error.URLError:
-            raise urllib.error.URLError(f"Failed to download book {book_id} from Project Gutenberg")
+    return _download_gutenberg(book_id, save_path, _fetch_text)
 
 
-def clean_gutenberg_text(text: str) -> str:
+def download_gutenberg_bytes(book_id: int, save_path: str = None) -> bytes:
     """
-    Cleans Project Gutenberg text by removing:
-    - Project Gutenberg header and footer
-    - License information
-    - Extra whitespace
+    Downloads a text from Project Gutenberg by book ID without decoding it.
+    Pair with clean_gutenberg_bytes, which only decodes the book body.
     
     Args:
-        text (str): Raw text from Project Gutenberg
+        book_id (int): The Project Gutenberg book ID
+        save_path (str, optional): Path to save the downloaded text.
+                                   If None, text is not saved to disk.
     
     Returns:
-        str: Cleaned text ready for training
+        bytes: The downloaded UTF-8 content
+    
+    Raises:
+        urllib.error.URLError: If download fails
     """
-    # Find the start marker (usually "*** START OF")
-    start_markers = [
-        "*** start of",
-        "***start of",
-        "*start of the project gutenberg",
-        "start of the project gutenberg"
-    ]
+    return _download_gutenberg(book_id, save_path, _fetch_bytes)
+
+
+def _find_content_bounds(data, start_re, end_re, fallback_res, newline) -> Tuple[int, int]:
+    """
+    Locates the book body between the Project Gutenberg header and footer.
+    Works on both str and bytes, given patterns and a newline of that type.
     
+    Returns:
+        Tuple[int, int]: (start_idx, end_idx); start_idx is -1 if no start was found
+    """
+    # Find the start marker (usually "*** START OF")
     start_idx = -1
-    for marker in start_markers:
-        idx = text.lower().find(marker)
-        if idx != -1:
-            # Find the first newline after the marker
-            start_idx = text.find('\n', idx)
-            break
+    match = start_re.search(data)
+    if match:
+        # Find the first newline after the marker
+        start_idx = data.find(newline, match.start())
     
     if start_idx == -1:
         # If no start marker found, try to find first sentence
         # Look for common patterns after metadata
-        patterns = [
-            r"\*\*\*.*?\n\n",
-            r"chapter [i1]\s*\n",
-            r"chapter one\s*\n"
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in fallback_res:
+            match = pattern.search(data)
             if match:
                 start_idx = match.end()
                 break
     
-    # Find the end marker (usually "*** END OF")
-    end_markers = [
-        "*** end of",
-        "***end of",
-        "*end of the project gutenberg",
-        "end of the project gutenberg"
-    ]
-    
-    end_idx = len(text)
-    for marker in end_markers:
-        idx = text.lower().rfind(marker)
-        if idx != -1:
-            # Find the last newline before the marker
-            end_idx = text.rfind('\n', 0, idx)
-            break
+    # Find the end marker (usually "*** END OF") after the start of the content
+    end_idx = len(data)
+    match = end_re.search(data, max(start_idx, 0))
+    if match:
+        # Find the last newline before the marker
+        end_idx = data.rfind(newline, 0, match.start())
+    
+    return start_idx, end_idx
+
+
+def clean_gutenberg_text(text: str) -> str:
+    """
+    Cleans Project Gutenberg text by removing:
+    - Project Gutenberg header and footer
+    - License information
+    - Extra whitespace
+    
+    Args:
+        text (str): Raw text from Project Gutenberg
+    
+    Returns:
+        str: Cleaned text ready for training
+    """
+    start_idx, end_idx = _find_content_bounds(
+        text, _START_RE, _END_RE, _FALLBACK_START_RES, '\n'
+    )
     
     # Extract the main text content
     if start_idx != -1 and end_idx > start_idx:
         text = text[start_idx:end_idx]
     
-    # Remove excessive whitespace (multiple newlines)
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    # Collapse 3+ newlines into a paragraph break and runs of spaces into one
+    text = _WS_RE.sub(_collapse_whitespace, text)
+    
+    return text.strip()
+
+
+def clean_gutenberg_bytes(data: bytes) -> str:
+    """
+    Cleans raw Project Gutenberg bytes, as returned by download_gutenberg_bytes.
+    
+    The header and footer are located on the undecoded bytes, and only the
+    book body is decoded (through a memoryview, so slicing does not copy).
+    
+    Args:
+        data (bytes): Raw UTF-8 bytes from Project Gutenberg
+    
+    Returns:
+        str: Cleaned text ready for training
+    """
+    start_idx, end_idx = _find_content_bounds(
+        data, _START_RE_BYTES, _END_RE_BYTES, _FALLBACK_START_RES_BYTES, b'\n'
+    )
+    
+    # Decode only the main text content
+    view = memoryview(data)
+    if start_idx != -1 and end_idx > start_idx:
+        view = view[start_idx:end_idx]
+    text = str(view, 'utf-8')
     
-    # Remove extra spaces
-    text = re.sub(r' +', ' ', text)
+    # Collapse 3+ newlines into a paragraph break and runs of spaces into one
+    text = _WS_RE.sub(_collapse_whitespace, text)
     
     return text.strip()
 
 
+def load_gutenberg_text(book_id: int, cache_dir: str) -> str:
+    """
+    Returns the cleaned text of a Project Gutenberg book, downloading and
+    cleaning it only on the first call.
+    
+    The cleaned text is cached in cache_dir as
+    gutenberg_{book_id}.v{_CLEAN_CACHE_VERSION}.clean.txt; bump
+    _CLEAN_CACHE_VERSION when the cleaning rules change. The cache file is
+    written to a temporary file and moved into place, so an interrupted run
+    never leaves a partial cache behind.
+    
+    Args:
+        book_id (int): The Project Gutenberg book ID
+        cache_dir (str): Directory holding the cleaned-text cache
+    
+    Returns:
+        str: Cleaned text ready for training
+    
+    Raises:
+        urllib.error.URLError: If the book is not cached and download fails
+    """
+    cache_path = os.path.join(cache_dir, f"gutenberg_{book_id}.v{_CLEAN_CACHE_VERSION}.clean.txt")
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    text = clean_gutenberg_bytes(download_gutenberg_bytes(book_id))
+    
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    
+    return text
+
+
 def extract_text_from_file(file_path: str) -> str:
     """
     Extracts and returns text from a local file.
@@ -166,7 +342,7 @@ def preprocess_text_for_training(text: str, clean_gutenberg: bool = True) -> str
     if clean_gutenberg:
         text = clean_gutenberg_text(text)
     
-    # Basic cleaning already handled in TrigramModel._clean_text
+    # Basic cleaning already handled in TrigramModel._preprocess
     # This function is here for additional preprocessing if needed
     
     return text
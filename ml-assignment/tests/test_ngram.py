@@ -1,4 +1,6 @@
 import pytest
+import copy
+import random
 from src.ngram_model import TrigramModel
 
 def test_fit_and_generate():
@@ -23,4 +25,71 @@ def test_short_text():
     generated_text = model.generate()
     assert isinstance(generated_text, str)
 
+def test_small_fanout_sampling_matches_counts():
+    model = TrigramModel(unk_threshold=0)
+    model.fit("a b c a b c a b c a b d")
+    random.seed(0)
+    draws = [model._sample_next_word("a", "b") for _ in range(4000)]
+    # "a b" is followed by "c" three times and by "d" once
+    assert set(draws) == {"c", "d"}
+    assert 0.7 < draws.count("c") / len(draws) < 0.8
 
+def test_alias_sampling_matches_counts():
+    model = TrigramModel(unk_threshold=0)
+    followers = ["c"] * 10 + [f"w{i}" for i in range(10)]
+    model.fit(" ".join(f"a b {word}" for word in followers))
+    random.seed(0)
+    draws = [model._sample_next_word("a", "b") for _ in range(4000)]
+    # "a b" has 11 distinct next words, and half of its occurrences are "c"
+    assert set(draws) == set(followers)
+    assert 0.45 < draws.count("c") / len(draws) < 0.55
+
+def test_rare_words_become_unk():
+    model = TrigramModel(unk_threshold=1)
+    model.fit("the cat sat the dog sat")
+    assert model.vocab == {"the": 2, "sat": 2, "<unk>": 2}
+
+def test_num_tokens():
+    model = TrigramModel()
+    model.fit("I am a test sentence.")
+    assert model.num_tokens == 5
+
+def test_refit_replaces_previous_training():
+    model = TrigramModel(unk_threshold=0)
+    model.fit("a b c")
+    model.fit("d e f")
+    assert set(model.vocab) == {"d", "e", "f"}
+    assert ("a", "b") not in model.context_index
+    assert model.generate() == "d e f"
+
+def test_refit_with_empty_text_clears_model():
+    model = TrigramModel(unk_threshold=0)
+    model.fit("a b c")
+    model.fit("")
+    assert model.num_tokens == 0
+    assert not model.vocab and not model.context_index
+    assert model.generate() == ""
+
+def test_deepcopy_then_refit_is_independent():
+    model = TrigramModel(unk_threshold=0)
+    model.fit("a b c")
+    assert model.generate() == "a b c"
+    copied = copy.deepcopy(model)
+    copied.fit("x y z")
+    assert copied.generate() == "x y z"
+    assert model.generate() == "a b c"
+
+def test_generate_sampling_matches_counts():
+    model = TrigramModel(unk_threshold=0)
+    followers = ["c"] * 10 + [f"w{i}" for i in range(10)]
+    model.fit(" ".join(f"a b {word}" for word in followers))
+    random.seed(0)
+    draws = [model.generate(max_length=1, seed_text=("a", "b")) for _ in range(4000)]
+    # generate draws through the same samplers as _sample_next_word
+    assert set(draws) == set(followers)
+    assert 0.45 < draws.count("c") / len(draws) < 0.55
+
+def test_generate_accepts_unbounded_max_length():
+    model = TrigramModel(unk_threshold=0)
+    model.fit("a b c")
+    assert model.generate(max_length=float("inf")) == "a b c"
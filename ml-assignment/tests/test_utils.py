@@ -0,0 +1,58 @@
+import os
+import pytest
+from src import utils
+from src.utils import clean_gutenberg_bytes, clean_gutenberg_text, load_gutenberg_text
+
+HEADER = "The Project Gutenberg eBook of Test\n\n*** START OF THE PROJECT GUTENBERG EBOOK TEST ***\n"
+FOOTER = "\n*** END OF THE PROJECT GUTENBERG EBOOK TEST ***\n"
+
+def test_clean_strips_header_and_footer():
+    text = HEADER + "Once upon a time.\nThe end.\n" + FOOTER + "Some licence text.\n"
+    assert clean_gutenberg_text(text) == "Once upon a time.\nThe end."
+
+def test_clean_cuts_at_first_end_marker_after_start():
+    # The licence after the footer repeats an "*** END OF" marker; nothing
+    # between the footer and that second marker belongs to the book
+    licence = "Licence terms.\n*** END OF THE PROJECT GUTENBERG LICENSE ***\n"
+    text = HEADER + "Once upon a time.\n" + FOOTER + licence
+    assert clean_gutenberg_text(text) == "Once upon a time."
+
+def test_clean_collapses_whitespace():
+    text = HEADER + "One   two.\n\n\n\nThree  four. Five\n\nsix.\n" + FOOTER
+    assert clean_gutenberg_text(text) == "One two.\n\nThree four. Five\n\nsix."
+
+def test_clean_without_markers_keeps_text():
+    assert clean_gutenberg_text("Just  some\n\n\n\ntext.") == "Just some\n\ntext."
+
+@pytest.mark.parametrize("text", [
+    HEADER + "Caf\u00e9   cr\u00e8me.\n\n\n\n\u00bfQu\u00e9 tal?\n" + FOOTER + "Licence.\n",
+    "Na\u00efve   r\u00e9sum\u00e9\n\n\n\n\u65e5\u672c\u8a9e.",
+])
+def test_clean_bytes_matches_clean_text(text):
+    assert clean_gutenberg_bytes(text.encode("utf-8")) == clean_gutenberg_text(text)
+
+def test_load_gutenberg_text_cache_hit(tmp_path, monkeypatch):
+    def fail_download(book_id):
+        raise AssertionError("cached book must not be downloaded")
+    monkeypatch.setattr(utils, "download_gutenberg_bytes", fail_download)
+    cache_path = tmp_path / f"gutenberg_11.v{utils._CLEAN_CACHE_VERSION}.clean.txt"
+    cache_path.write_text("cached text", encoding="utf-8")
+    assert load_gutenberg_text(11, str(tmp_path)) == "cached text"
+
+def test_load_gutenberg_text_cache_miss(tmp_path, monkeypatch):
+    raw = HEADER + "Caf\u00e9  text.\n" + FOOTER
+    monkeypatch.setattr(utils, "download_gutenberg_bytes", lambda book_id: raw.encode("utf-8"))
+    replaced = []
+    real_replace = os.replace
+    def spy_replace(src, dst):
+        replaced.append((src, dst))
+        real_replace(src, dst)
+    monkeypatch.setattr(utils.os, "replace", spy_replace)
+    
+    text = load_gutenberg_text(11, str(tmp_path))
+    
+    cache_path = tmp_path / f"gutenberg_11.v{utils._CLEAN_CACHE_VERSION}.clean.txt"
+    assert text == "Caf\u00e9 text."
+    assert replaced and replaced[0][1] == str(cache_path)
+    assert cache_path.read_text(encoding="utf-8") == text
+    assert [p.name for p in tmp_path.iterdir()] == [cache_path.name]